@@ -0,0 +1,289 @@
+"""Shared data loading and map building for the Streamlit pages.
+
+Keeping this in one module means every page shares the same st.cache_data /
+st.cache_resource entries (DataFrame, reprojected polygons, geocoding) and
+the import cost of pandas/folium/pyproj is paid once per process.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import streamlit as st
+import folium
+import ijson
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pyproj import Transformer
+import pydeck as pdk
+import requests
+
+# Shared HTTP session so repeated Kakao calls reuse the TLS connection
+@st.cache_resource
+def get_session():
+    return requests.Session()
+
+# Function to get latitude and longitude from an address; cached so typing
+# reruns don't re-hit the Kakao API for the same address
+@st.cache_data(ttl=3600)
+def lat_long(address, rest_api_key):
+    url = 'https://dapi.kakao.com/v2/local/search/address.json?query=' + address
+    headers = {"Authorization": "KakaoAK " + rest_api_key}
+    try:
+        response = get_session().get(url, headers=headers, timeout=3)
+        json_result = response.json()
+        address_xy = json_result['documents'][0]['address']
+        return float(address_xy['x']), float(address_xy['y'])
+    except Exception as e:
+        st.error(f"Error: {e}")
+        return None, None
+
+# Load CSV data (cached so reruns don't reparse the file) through pyarrow's
+# multithreaded CSV reader; to_pandas with split_blocks/self_destruct hands
+# the buffers to pandas without an extra copy. The code columns are small
+# integers and the repeated strings become categories, which shrinks the
+# frame and speeds up the groupby/value_counts in the plots;
+# x/y stay float64 so the map coordinates keep full precision
+@st.cache_data
+def load_crisis_df(path):
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(column_types={
+        'DST_RSK_DSTRCT_TYPE_CD': pa.int8(),
+        'DST_RSK_DSTRCT_GRD_CD': pa.int8(),
+        'DSGN_AREA': pa.float32()
+    }))
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    return df.astype({
+        'DST_RSK_DSTRCT_NM': 'category',
+        'FCLT_NM': 'category',
+        'DSGN_RSN': 'category'
+    })
+
+color_map = {
+    1: 'blue',
+    2: 'purple',
+    3: 'gray',
+    4: 'orange',
+    5: 'green',
+    6: 'darkblue'
+}
+
+# RGB values for the folium color names so both renderers share color_map
+color_rgb = {
+    'blue': [0, 0, 255],
+    'purple': [128, 0, 128],
+    'gray': [128, 128, 128],
+    'orange': [255, 165, 0],
+    'green': [0, 128, 0],
+    'darkblue': [0, 0, 139],
+    'red': [255, 0, 0],
+    'yellow': [255, 255, 0],
+    'brown': [165, 42, 42]
+}
+
+# Polygon JSON files to overlay on the map
+json_files = [
+    {'path': './data/전라남도_나주시_노안면_학산리_논.json', 'color': 'yellow'},
+    {'path': './data/전라남도_나주시_노안면_학산리_밭.json', 'color': 'green'},
+    {'path': './data/전라남도_나주시_노안면_학산리_과수.json', 'color': 'red'},
+    {'path': './data/전라남도_나주시_노안면_학산리_비경지.json', 'color': 'brown'},
+    {'path': './data/전라남도_나주시_노안면_학산리_시설.json', 'color': 'gray'}
+]
+
+# Load one polygon JSON file and convert its coordinates to lat/lon. Each
+# worker builds its own Transformer because pyproj transformers are not
+# thread-safe; always_xy=True keeps the axis order as (x, y) / (lon, lat)
+def _reproject_polygon_file(path, src_crs="EPSG:5179", dst_crs="EPSG:4326"):
+    transformer = Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+    # Stream the features one at a time instead of materializing the whole
+    # file; only one item dict is alive at once, so peak memory stays flat
+    # no matter how large the farmmap file grows. Convert each ring to an
+    # (N, 2) array up front and concatenate into a ragged layout so the
+    # reprojection is still a single vectorized transform call.
+    polygon_meta = []
+    rings_xy = []
+    with open(path, 'rb') as f:
+        for item in ijson.items(f, 'output.farmmapData.data.item', use_float=True):
+            polygon_meta.append((item['uid'], item['pnu'], len(item['geometry'])))
+            for geometry in item['geometry']:
+                rings_xy.append(np.array([[coord['x'], coord['y']] for coord in geometry['xy']], dtype=np.float64))
+
+    ring_lengths = [len(ring) for ring in rings_xy]
+    flat_xy = np.concatenate(rings_xy)
+    lons, lats = transformer.transform(flat_xy[:, 0], flat_xy[:, 1])
+
+    # Quantize to 6 decimal degrees (~10 cm) before slicing back into
+    # per-polygon rings; Leaflet can't show more precision and the shorter
+    # numbers keep the rendered map HTML substantially smaller
+    rings = np.split(np.round(np.column_stack([lats, lons]), 6), np.cumsum(ring_lengths)[:-1])
+
+    coordinates_list = []
+    ring_idx = 0
+    for uid, pnu, n_rings in polygon_meta:
+        polygon_info = {
+            'uid': uid,
+            'pnu': pnu,
+            'coordinates': [rings[ring_idx + i].tolist() for i in range(n_rings)]
+        }
+        ring_idx += n_rings
+        coordinates_list.append(polygon_info)
+    return coordinates_list
+
+# Parquet with pre-reprojected EPSG:4326 coordinates, written by
+# preprocess_polygons.py; loading it skips PROJ at request time entirely
+polygon_parquet_path = './data/polygons_4326.parquet'
+
+def _load_polygons_from_parquet(parquet_path, paths):
+    table = pd.read_parquet(parquet_path)
+    # Same 6-decimal quantization as the JSON fallback path
+    table[['lat', 'lon']] = table[['lat', 'lon']].round(6)
+    results = {}
+    for path in paths:
+        part = table[table['path'] == path]
+        coordinates_list = []
+        for (uid, pnu), polygon in part.groupby(['uid', 'pnu'], sort=False):
+            polygon_info = {
+                'uid': uid,
+                'pnu': pnu,
+                'coordinates': []
+            }
+            for _, ring in polygon.groupby('ring_idx', sort=False):
+                polygon_info['coordinates'].append(list(zip(ring['lat'], ring['lon'])))
+            coordinates_list.append(polygon_info)
+        results[path] = coordinates_list
+    return results
+
+# Load all polygon files, preferring the pre-reprojected Parquet. Falls back
+# to reprojecting the JSON files in parallel; the files are independent and
+# PROJ releases the GIL during the batched transform, so threads overlap.
+# Cached so the whole pass runs once per process lifetime.
+@st.cache_data
+def load_all_polygons(paths):
+    if os.path.exists(polygon_parquet_path):
+        return _load_polygons_from_parquet(polygon_parquet_path, paths)
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        results = list(executor.map(_reproject_polygon_file, paths))
+    return dict(zip(paths, results))
+
+# Build the full folium map: risk circles from the CSV, an optional address
+# marker, and the polygon overlays from the JSON files
+def build_map(df, address, address_x, address_y):
+    m = folium.Map(location=[address_y, address_x], zoom_start=15 if address else 8)
+
+    # Add circles from CSV data: drop incomplete rows up front and precompute
+    # radius/color as columns so the loop only builds folium objects
+    sub = df.dropna(subset=['x', 'y', 'DSGN_AREA']).copy()
+    sub['radius'] = np.sqrt(sub['DSGN_AREA'])
+    sub['color'] = sub['DST_RSK_DSTRCT_TYPE_CD'].map(color_map).fillna('red')
+
+    # Build the popup HTML as one vectorized string concat instead of
+    # evaluating an f-string per row
+    sub['popup'] = (
+        "<b>재해위험지구관리번호:</b> " + sub['DST_RSK_DSTRCT_NM'].astype(str)
+        + "<br><b>재해위험지구등급코드:</b> " + sub['DST_RSK_DSTRCT_GRD_CD'].astype(str)
+        + "<br><b>재해위험지구유형코드:</b> " + sub['DST_RSK_DSTRCT_TYPE_CD'].astype(str)
+        + "<br><b>재해위험지구코드:</b> " + sub['DST_RSK_DSTRCTCD'].astype(str)
+        + "<br><b>재해위험지구지역코드:</b> " + sub['DST_RSK_DSTRCT_RGN_CD'].astype(str)
+        + "<br><b>시설명:</b> " + sub['FCLT_NM'].astype(str)
+        + "<br><b>지정일자:</b> " + sub['DSGN_YMD'].astype(str)
+        + "<br><b>지정사유:</b> " + sub['DSGN_RSN'].astype(str)
+    )
+
+    # Collect the circles in one FeatureGroup and attach it to the map once
+    # instead of adding every circle as a separate child of the map
+    risk_group = folium.FeatureGroup(name='risk')
+    for row in sub.itertuples(index=False):
+        popup = folium.Popup(row.popup, max_width=300)
+
+        risk_group.add_child(folium.Circle(
+            location=[row.y, row.x],
+            radius=row.radius,
+            color=row.color,
+            fill=True,
+            fill_color=row.color,
+            fill_opacity=0.5,
+            popup=popup
+        ))
+    risk_group.add_to(m)
+
+    if address and address_x is not None and address_y is not None:
+        folium.Marker([address_y, address_x], popup=address).add_to(m)
+
+    # Process each JSON file, batching the polygons per file into a FeatureGroup
+    polygons_by_path = load_all_polygons(tuple(fi['path'] for fi in json_files))
+    for file_info in json_files:
+        coordinates_list = polygons_by_path[file_info['path']]
+
+        # Add polygons to the group with popup info and different colors
+        polygon_group = folium.FeatureGroup(name=file_info['path'])
+        for polygon_info in coordinates_list:
+            for coordinates in polygon_info['coordinates']:
+                polygon_group.add_child(folium.Polygon(
+                    locations=coordinates,
+                    color=file_info['color'],
+                    weight=2,
+                    fill=True,
+                    fill_color=file_info['color'],
+                    popup=f"UID: {polygon_info['uid']}<br>PNU: {polygon_info['pnu']}"
+                ))
+        polygon_group.add_to(m)
+
+    return m
+
+# Render the map once per (data, address) combination; re-serializing the
+# folium tree to HTML on every rerun is what makes the page feel slow
+@st.cache_data(hash_funcs={pd.DataFrame: lambda d: pd.util.hash_pandas_object(d).sum()})
+def render_map_html(df, address, address_x, address_y):
+    m = build_map(df, address, address_x, address_y)
+    return m.get_root().render()
+
+# GPU-rendered alternative to the folium map: deck.gl handles tens of
+# thousands of features where Leaflet's SVG path becomes browser-bound
+def build_deck(df, address, address_x, address_y):
+    sub = df.dropna(subset=['x', 'y', 'DSGN_AREA']).copy()
+    sub['radius'] = np.sqrt(sub['DSGN_AREA'])
+    sub['fill_color'] = sub['DST_RSK_DSTRCT_TYPE_CD'].map(color_map).fillna('red').map(color_rgb)
+
+    circle_layer = pdk.Layer(
+        "ScatterplotLayer",
+        sub[['x', 'y', 'radius', 'fill_color', 'DST_RSK_DSTRCT_NM']],
+        get_position=['x', 'y'],
+        get_radius='radius',
+        get_fill_color='fill_color',
+        opacity=0.5,
+        pickable=True
+    )
+
+    polygon_records = []
+    polygons_by_path = load_all_polygons(tuple(fi['path'] for fi in json_files))
+    for file_info in json_files:
+        rgb = color_rgb[file_info['color']]
+        for polygon_info in polygons_by_path[file_info['path']]:
+            for coordinates in polygon_info['coordinates']:
+                polygon_records.append({
+                    'polygon': [[lon, lat] for lat, lon in coordinates],
+                    'fill_color': rgb,
+                    'uid': polygon_info['uid'],
+                    'pnu': polygon_info['pnu']
+                })
+    polygon_layer = pdk.Layer(
+        "PolygonLayer",
+        polygon_records,
+        get_polygon='polygon',
+        get_fill_color='fill_color',
+        get_line_color='fill_color',
+        line_width_min_pixels=2,
+        opacity=0.5,
+        pickable=True
+    )
+
+    view_state = pdk.ViewState(latitude=address_y, longitude=address_x, zoom=15 if address else 8)
+    return pdk.Deck(
+        layers=[circle_layer, polygon_layer],
+        initial_view_state=view_state,
+        tooltip={'html': 'UID: {uid}<br>PNU: {pnu}'}
+    )
+
+@st.cache_data(hash_funcs={pd.DataFrame: lambda d: pd.util.hash_pandas_object(d).sum()})
+def render_deck_html(df, address, address_x, address_y):
+    deck = build_deck(df, address, address_x, address_y)
+    return deck.to_html(as_string=True)
@@ -0,0 +1,55 @@
+"""Reproject the polygon JSON files to EPSG:4326 and persist them as Parquet.
+
+Run this once whenever the JSON files under ./data change:
+
+    python preprocess_polygons.py
+
+The app loads the resulting data/polygons_4326.parquet directly, so no
+reprojection happens at request time.
+"""
+import numpy as np
+import pandas as pd
+import orjson
+from pyproj import Transformer
+
+json_paths = [
+    './data/전라남도_나주시_노안면_학산리_논.json',
+    './data/전라남도_나주시_노안면_학산리_밭.json',
+    './data/전라남도_나주시_노안면_학산리_과수.json',
+    './data/전라남도_나주시_노안면_학산리_비경지.json',
+    './data/전라남도_나주시_노안면_학산리_시설.json'
+]
+
+parquet_path = './data/polygons_4326.parquet'
+
+
+def reproject_file(path, transformer):
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    items = data['output']['farmmapData']['data']
+    flat_y = []
+    flat_x = []
+    rows = []
+    for item in items:
+        for ring_idx, geometry in enumerate(item['geometry']):
+            for coord in geometry['xy']:
+                flat_y.append(coord['y'])
+                flat_x.append(coord['x'])
+                rows.append((path, item['uid'], item['pnu'], ring_idx))
+
+    lons, lats = transformer.transform(np.asarray(flat_x, dtype=np.float64),
+                                       np.asarray(flat_y, dtype=np.float64))
+
+    frame = pd.DataFrame(rows, columns=['path', 'uid', 'pnu', 'ring_idx'])
+    frame['lat'] = lats
+    frame['lon'] = lons
+    return frame
+
+
+if __name__ == '__main__':
+    transformer = Transformer.from_crs("EPSG:5179", "EPSG:4326", always_xy=True)
+    frames = [reproject_file(path, transformer) for path in json_paths]
+    table = pd.concat(frames, ignore_index=True)
+    table.to_parquet(parquet_path, index=False)
+    print(f"Wrote {len(table)} vertices to {parquet_path}")